@@ -1,71 +1,332 @@
 """Deduplicator action module."""
 import hashlib
+import mmap
+import os
+import sqlite3
+import stat
+import sys
+from functools import partial
 from pathlib import Path
-from typing import List, Union, Dict, Any
+from typing import List, Union, Dict, Any, Optional
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from config import DEFAULT_CONFIG_DIR
+
+try:
+    from blake3 import blake3
+except ImportError:  # Optional: faster content hashing
+    blake3 = None
+
+try:
+    import xxhash
+except ImportError:  # Optional: fast non-cryptographic pre-hash
+    xxhash = None
+
+try:
+    from send2trash import send2trash
+except ImportError:  # Optional: in-process move to trash
+    send2trash = None
+
+# usedforsecurity=False lets OpenSSL skip FIPS checks and pick its
+# fastest (e.g. SHA-NI) implementation; the flag exists since Python 3.9
+if sys.version_info >= (3, 9):
+    _new_sha256 = partial(hashlib.sha256, usedforsecurity=False)
+else:
+    _new_sha256 = hashlib.sha256
+
+# Persistent content hash cache, reused across runs for unchanged files
+DEFAULT_HASH_CACHE = DEFAULT_CONFIG_DIR / "hash_cache.sqlite"
+
+# Bytes read from each end of a file for the quick pre-hash
+HEAD_HASH_SIZE = 4096
+
+# Files larger than this are memory-mapped and hashed in one call
+MMAP_THRESHOLD = 1 << 20
+
+
+def _as_path(item: Union[Path, os.DirEntry]) -> Path:
+    """Convert an os.scandir entry to a Path; pass Paths through."""
+    return Path(item.path) if isinstance(item, os.DirEntry) else item
+
+
+# Name of the content hash algorithm, stored with cached digests
+HASH_ALGORITHM = "blake3" if blake3 is not None else "sha256"
+
+
+def hash_backend() -> str:
+    """Describe the content hash backend in use, for logs."""
+    if blake3 is not None:
+        return HASH_ALGORITHM
+    try:
+        import ssl
+        return f"sha256 ({ssl.OPENSSL_VERSION})"
+    except ImportError:
+        return "sha256"
 
 
 class Deduplicator:
     """Handles duplicate file detection and handling."""
 
+    def __init__(self, cache_path: Optional[Path] = DEFAULT_HASH_CACHE):
+        """
+        Args:
+            cache_path: SQLite file caching content hashes across runs
+                (None disables the cache)
+        """
+        # stat results gathered while scanning, reused when handling groups
+        self._stat_cache: Dict[Path, os.stat_result] = {}
+        self.cache_path = cache_path
+        self._cache_db: Optional[sqlite3.Connection] = None
+
     def find_duplicates(
         self,
-        files: List[Path],
+        files: List[Union[Path, os.DirEntry]],
         check_by: str = "content",
     ) -> List[List[Path]]:
         """
         Find duplicate files.
 
         Args:
-            files: List of files to check
+            files: List of files to check (paths or os.scandir entries)
             check_by: "content" (hash) or "name"
 
         Returns:
             List of duplicate groups (each group is a list of paths)
         """
+        # Stats from an earlier call may be stale; handle_duplicates must
+        # only see the ones gathered for these groups
+        self._stat_cache = {}
+
         if check_by == "name":
             return self._find_by_name(files)
         else:
             return self._find_by_content(files)
 
-    def _find_by_name(self, files: List[Path]) -> List[List[Path]]:
+    def _find_by_name(self, files: List[Union[Path, os.DirEntry]]) -> List[List[Path]]:
         """Find duplicates by filename."""
         groups = defaultdict(list)
 
-        for file_path in files:
-            groups[file_path.name].append(file_path)
+        for item in files:
+            groups[item.name].append(item)
 
-        # Return only groups with more than one file
-        return [paths for paths in groups.values() if len(paths) > 1]
+        # Return only groups with more than one file; only those need Paths
+        return [
+            [_as_path(item) for item in items]
+            for items in groups.values()
+            if len(items) > 1
+        ]
 
-    def _find_by_content(self, files: List[Path]) -> List[List[Path]]:
-        """Find duplicates by content hash."""
-        hash_groups = defaultdict(list)
+    def _find_by_content(self, files: List[Union[Path, os.DirEntry]]) -> List[List[Path]]:
+        """
+        Find duplicates by content hash.
 
-        for file_path in files:
-            if not file_path.is_file():
-                continue
+        Files are first grouped by size, then by a hash of their first and
+        last HEAD_HASH_SIZE bytes; only the remaining candidates are fully
+        hashed.
+        """
+        size_groups = defaultdict(list)
 
+        for item in files:
             try:
-                file_hash = self._hash_file(file_path)
-                hash_groups[file_hash].append(file_path)
-            except Exception:
-                # Skip files that can't be read
+                # DirEntry caches its stat from the directory scan
+                file_stat = item.stat() if isinstance(item, os.DirEntry) else os.stat(item)
+            except OSError:
+                continue
+            if not stat.S_ISREG(file_stat.st_mode):
+                continue
+
+            size_groups[file_stat.st_size].append((item, file_stat))
+
+        candidates = []
+        for items in size_groups.values():
+            if len(items) < 2:
                 continue
 
-        # Return only groups with more than one file
+            paths = []
+            for item, file_stat in items:
+                file_path = _as_path(item)
+                self._stat_cache[file_path] = file_stat
+                paths.append(file_path)
+            candidates.append(paths)
+
+        candidates = self._regroup(candidates, self._hash_ends)
+
+        duplicates = []
+        full_hash = []
+        for paths in candidates:
+            # The ends hash already covered the whole content of small files;
+            # an xxh3 match is still confirmed with the content hash
+            if xxhash is None and self._stat_cache[paths[0]].st_size <= 2 * HEAD_HASH_SIZE:
+                duplicates.append(paths)
+            else:
+                full_hash.append(paths)
+
+        duplicates.extend(self._regroup(full_hash, self._hash_file, use_cache=True))
+        return duplicates
+
+    def _regroup(
+        self,
+        groups: List[List[Path]],
+        hash_func,
+        use_cache: bool = False,
+    ) -> List[List[Path]]:
+        """Split each group by hash_func, keeping only groups with more than one file."""
+        jobs = [(index, file_path) for index, paths in enumerate(groups) for file_path in paths]
+        if not jobs:
+            return []
+
+        # Cache lookups happen here, not in the workers: sqlite connections
+        # must stay on the thread that created them
+        hashes: Dict[Path, Optional[str]] = {}
+        if use_cache:
+            hashes.update(self._cache_lookup([file_path for _, file_path in jobs]))
+
+        paths = [file_path for _, file_path in jobs if file_path not in hashes]
+
+        # Hashing releases the GIL, so threads overlap file reads with hashing
+        computed: Dict[Path, Optional[str]] = {}
+        if paths:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                computed.update(zip(paths, executor.map(
+                    lambda file_path: self._try_hash(hash_func, file_path), paths
+                )))
+
+        if use_cache:
+            self._cache_store(computed)
+        hashes.update(computed)
+
+        hash_groups = defaultdict(list)
+        for index, file_path in jobs:
+            file_hash = hashes[file_path]
+            if file_hash is not None:
+                hash_groups[(index, file_hash)].append(file_path)
+
         return [paths for paths in hash_groups.values() if len(paths) > 1]
 
-    def _hash_file(self, file_path: Path, chunk_size: int = 8192) -> str:
-        """Calculate SHA256 hash of a file."""
-        hasher = hashlib.sha256()
+    def _try_hash(self, hash_func, file_path: Path) -> Optional[str]:
+        """Hash a file, returning None if it can't be read."""
+        try:
+            return hash_func(file_path)
+        except Exception:
+            return None
+
+    def _hash_ends(self, file_path: Path) -> str:
+        """Calculate a quick hash of the first and last HEAD_HASH_SIZE bytes of a file."""
+        hasher = xxhash.xxh3_64() if xxhash is not None else self._new_hasher()
+        size = self._stat(file_path).st_size
+
+        with open(file_path, "rb") as f:
+            hasher.update(f.read(HEAD_HASH_SIZE))
+            if size > HEAD_HASH_SIZE:
+                # Tail, without re-reading bytes the head already covered
+                f.seek(max(size - HEAD_HASH_SIZE, HEAD_HASH_SIZE))
+                hasher.update(f.read(HEAD_HASH_SIZE))
+
+        return hasher.hexdigest()
+
+    def _new_hasher(self):
+        """Create a content hasher (BLAKE3 if installed, else SHA256)."""
+        if blake3 is not None:
+            return blake3()
+        return _new_sha256()
 
+    def _hash_file(self, file_path: Path, chunk_size: int = 1 << 20) -> str:
+        """Calculate content hash of a file."""
         with open(file_path, "rb") as f:
-            while chunk := f.read(chunk_size):
-                hasher.update(chunk)
+            if self._stat(file_path).st_size > MMAP_THRESHOLD:
+                # Hash straight from the page cache without copying chunks
+                hasher = self._new_hasher()
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if hasattr(mmap, "MADV_SEQUENTIAL"):
+                        # Large media files: ask for aggressive readahead
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    hasher.update(mm)
+            elif hasattr(hashlib, "file_digest"):
+                # Python 3.11+: read loop runs in C with a reused buffer
+                hasher = hashlib.file_digest(f, self._new_hasher)
+            else:
+                hasher = self._new_hasher()
+                while chunk := f.read(chunk_size):
+                    hasher.update(chunk)
 
         return hasher.hexdigest()
 
+    def _open_cache(self) -> Optional[sqlite3.Connection]:
+        """Open the hash cache on first use; None if disabled or unavailable."""
+        if self._cache_db is None and self.cache_path is not None:
+            try:
+                db = sqlite3.connect(str(self.cache_path))
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS hashes ("
+                    "dev INTEGER, ino INTEGER, algo TEXT, size INTEGER, "
+                    "mtime_ns INTEGER, digest TEXT, PRIMARY KEY (dev, ino, algo))"
+                )
+                self._cache_db = db
+            except sqlite3.Error:
+                # Run without the cache rather than fail the scan
+                self.cache_path = None
+        return self._cache_db
+
+    def _cache_lookup(self, paths: List[Path]) -> Dict[Path, str]:
+        """
+        Get cached hashes for files whose inode, size and mtime are unchanged.
+
+        Files without a real inode number (st_ino 0: DirEntry stats on
+        Windows, some SMB/FUSE mounts) are never cached, since they would
+        all share one cache key.
+        """
+        db = self._open_cache()
+        if db is None:
+            return {}
+
+        found = {}
+        try:
+            for file_path in paths:
+                st = self._stat(file_path)
+                if not st.st_ino:
+                    continue
+                row = db.execute(
+                    "SELECT digest FROM hashes WHERE dev=? AND ino=? AND algo=? "
+                    "AND size=? AND mtime_ns=?",
+                    (st.st_dev, st.st_ino, HASH_ALGORITHM, st.st_size, st.st_mtime_ns),
+                ).fetchone()
+                if row is not None:
+                    found[file_path] = row[0]
+        except (sqlite3.Error, OSError):
+            pass
+
+        return found
+
+    def _cache_store(self, hashes: Dict[Path, Optional[str]]) -> None:
+        """Record newly computed hashes in one transaction."""
+        db = self._open_cache()
+        if db is None:
+            return
+
+        rows = []
+        for file_path, digest in hashes.items():
+            if digest is None:
+                continue
+            st = self._stat(file_path)
+            if not st.st_ino:
+                continue
+            rows.append((st.st_dev, st.st_ino, HASH_ALGORITHM, st.st_size, st.st_mtime_ns, digest))
+
+        try:
+            with db:
+                db.executemany("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)", rows)
+        except sqlite3.Error:
+            pass
+
+    def close(self) -> None:
+        """Close the hash cache; it is reopened if needed again."""
+        if self._cache_db is not None:
+            self._cache_db.close()
+            self._cache_db = None
+
     def handle_duplicates(
         self,
         duplicate_group: List[Path],
@@ -86,29 +347,45 @@ class Deduplicator:
             return
 
         # Determine which file to keep
-        if keep == "newest":
-            keep_file = max(duplicate_group, key=lambda p: p.stat().st_mtime)
-        elif keep == "oldest":
-            keep_file = min(duplicate_group, key=lambda p: p.stat().st_mtime)
+        if keep in ("newest", "oldest"):
+            mtimes = [self._stat(p).st_mtime for p in duplicate_group]
+            pick = max if keep == "newest" else min
+            keep_idx = pick(range(len(mtimes)), key=mtimes.__getitem__)
         else:  # "first"
-            keep_file = duplicate_group[0]
+            keep_idx = 0
+        keep_file = duplicate_group[keep_idx]
 
-        # Handle remaining files
-        for file_path in duplicate_group:
-            if file_path == keep_file:
-                continue
+        # Stats may be cached from detection; never remove the other copies
+        # if the one being kept has since been moved or deleted
+        if not keep_file.exists():
+            raise FileNotFoundError(f"File to keep not found: {keep_file}")
 
-            if tag_duplicates:
-                # Tag the duplicate instead of deleting
-                from .tagger import Tagger
-                tagger = Tagger()
-                tagger.add_tag(file_path, label=duplicate_label)
-            else:
+        # Handle remaining files (compared by path, so a path listed twice
+        # can never remove the kept file)
+        remaining = [p for p in duplicate_group if p != keep_file]
+
+        if tag_duplicates:
+            # Tag the duplicates instead of deleting
+            from .tagger import Tagger
+            Tagger().add_tags_bulk([(p, [duplicate_label]) for p in remaining])
+        else:
+            for file_path in remaining:
                 # Move to trash or delete
                 self._move_to_trash(file_path)
 
+    def _stat(self, file_path: Path) -> os.stat_result:
+        """Get stat result, reusing the one cached during detection."""
+        file_stat = self._stat_cache.get(file_path)
+        if file_stat is None:
+            file_stat = file_path.stat()
+        return file_stat
+
     def _move_to_trash(self, file_path: Path) -> None:
         """Move file to trash."""
+        if send2trash is not None:
+            send2trash(str(file_path))
+            return
+
         import platform
         import subprocess
 
@@ -1,9 +1,30 @@
 """File renamer action module."""
 import os
 import re
+from functools import lru_cache
 from pathlib import Path
 from typing import Union, Optional
 
+# Copy markers like "（1）", "(1)" and " [1] ", substituted in order; later
+# passes also see text inserted by earlier ones (e.g. whitespace replacements)
+_RENAME_CLEAN_RES = (
+    re.compile(r"（(\d+)）|\((\d+)\)"),
+    re.compile(r"\s*\(\d+\)\s*"),
+    re.compile(r"\s*\[\d+\]\s*"),
+)
+
+# Control chars and common symbols that cause issues
+_GARBLE_RE = re.compile(r"[\u0000-\u001f\u007f-\u009f™©®]")
+
+# Runs of whitespace, collapsed to a single space
+_WS_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=32)
+def _separator_run_re(separator: str) -> "re.Pattern":
+    """Compiled pattern matching a run of repeated separators."""
+    return re.compile(rf"{re.escape(separator)}+")
+
 
 class Renamer:
     """Handles file rename operations."""
@@ -42,9 +63,8 @@ class Renamer:
 
         # Apply regex replacement
         if replace:
-            name = re.sub(r"（(\d+)）|\((\d+)\)", replace, name)
-            name = re.sub(r"\s*\(\d+\)\s*", replace, name)
-            name = re.sub(r"\s*\[\d+\]\s*", replace, name)
+            for pattern in _RENAME_CLEAN_RES:
+                name = pattern.sub(replace, name)
 
         # Apply prefix
         if prefix:
@@ -55,7 +75,7 @@ class Renamer:
             name = f"{name}{separator}{suffix}"
 
         # Clean up multiple separators
-        name = re.sub(rf"{re.escape(separator)}+", separator, name)
+        name = _separator_run_re(separator).sub(separator, name)
         name = name.strip(separator)
 
         # New path
@@ -89,11 +109,10 @@ class Renamer:
         ext = file_path.suffix
 
         # Remove common garbled patterns
-        name = re.sub(r"[\u0000-\u001f\u007f-\u009f]", "", name)  # Control chars
-        name = re.sub(r"[™©®]", "", name)  # Common symbols that cause issues
+        name = _GARBLE_RE.sub("", name)
 
         # Clean up spaces
-        name = re.sub(r"\s+", " ", name)
+        name = _WS_RE.sub(" ", name)
         name = name.strip()
 
         new_path = file_path.parent / f"{name}{ext}"
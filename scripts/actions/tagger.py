@@ -1,9 +1,17 @@
 """Mac Tag action module."""
+import base64
 import os
 import platform
+import plistlib
 import subprocess
+from functools import lru_cache
 from pathlib import Path
-from typing import Union, Optional, List, Dict
+from typing import Union, Optional, List, Dict, Tuple
+
+try:
+    from Foundation import NSURL, NSURLTagNamesKey
+except ImportError:  # Optional: PyObjC sets tags in-process
+    NSURL = None
 
 
 # Mac Tag colors
@@ -18,6 +26,12 @@ TAG_COLORS = {
 }
 
 
+@lru_cache(maxsize=256)
+def _encode_tags(tags: Tuple[str, ...]) -> str:
+    """Encode a tag list as a base64 plist; the same color/label sets repeat a lot."""
+    return base64.b64encode(plistlib.dumps(list(tags))).decode()
+
+
 class Tagger:
     """Handles Mac Finder tags."""
 
@@ -64,31 +78,73 @@ class Tagger:
             return False
 
         try:
-            # Use xattr to set Finder tags (native macOS way)
-            tag_string = ", ".join(tags)
-            result = subprocess.run(
-                ["xattr", "-w", "com.apple.metadata:_kMDItemUserTags",
-                 self._create_plist(tags), str(file_path)],
-                capture_output=True,
-                check=False,
-            )
-
-            if result.returncode != 0:
-                # Fallback: use osascript
-                self._add_tag_osascript(file_path, tags)
-
+            self._write_tags(file_path, tags)
             return True
 
         except Exception as e:
             print(f"Error adding tag: {e}")
             return False
 
+    def add_tags_bulk(self, pairs: List[Tuple[Path, List[str]]]) -> int:
+        """
+        Set tags on many files in one pass.
+
+        Args:
+            pairs: (file path, tag list) pairs; empty tags are ignored
+
+        Returns:
+            Number of files tagged
+        """
+        if not self.is_macos:
+            print(f"Warning: Mac Tags not supported on {platform.system()}")
+            return 0
+
+        tagged = 0
+        for file_path, tags in pairs:
+            file_path = Path(file_path)
+            tags = [tag for tag in tags if tag]
+            if not tags or not file_path.exists():
+                continue
+
+            try:
+                self._write_tags(file_path, tags)
+                tagged += 1
+            except Exception as e:
+                print(f"Error adding tag: {e}")
+
+        return tagged
+
+    def _write_tags(self, file_path: Path, tags: List[str]) -> None:
+        """Write Finder tags, in-process via PyObjC when available."""
+        if NSURL is not None:
+            try:
+                if self._add_tag_native(file_path, tags):
+                    return
+            except Exception:
+                # Fall back to xattr below
+                pass
+
+        # Use xattr to set Finder tags (native macOS way)
+        result = subprocess.run(
+            ["xattr", "-w", "com.apple.metadata:_kMDItemUserTags",
+             self._create_plist(tags), str(file_path)],
+            capture_output=True,
+            check=False,
+        )
+
+        if result.returncode != 0:
+            # Fallback: use osascript
+            self._add_tag_osascript(file_path, tags)
+
+    def _add_tag_native(self, file_path: Path, tags: List[str]) -> bool:
+        """Set tags through NSURL resource values (no subprocess)."""
+        url = NSURL.fileURLWithPath_(str(file_path.resolve()))
+        success, _error = url.setResourceValue_forKey_error_(tags, NSURLTagNamesKey, None)
+        return bool(success)
+
     def _create_plist(self, tags: List[str]) -> str:
         """Create plist string for tags."""
-        import plistlib
-        data = plistlib.dumps(tags)
-        import base64
-        return base64.b64encode(data).decode()
+        return _encode_tags(tuple(tags))
 
     # 标签颜色索引: 0=无, 1=灰, 2=红, 3=橙, 4=黄, 5=绿, 6=蓝, 7=紫
     TAG_COLOR_INDEX = {
@@ -182,8 +238,6 @@ class Tagger:
             )
 
             if result.returncode == 0 and result.stdout:
-                import base64
-                import plistlib
                 data = base64.b64decode(result.stdout)
                 return plistlib.loads(data)
 
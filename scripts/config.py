@@ -4,6 +4,11 @@ import yaml
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
 # Default config paths
 DEFAULT_CONFIG_DIR = Path.home() / ".file-organizer"
 DEFAULT_RULES_DIR = DEFAULT_CONFIG_DIR / "rules"
@@ -31,7 +36,7 @@ class Config:
         """Load configuration from file."""
         if self.config_file.exists():
             with open(self.config_file, "r", encoding="utf-8") as f:
-                self._config = yaml.safe_load(f) or {}
+                self._config = yaml.load(f, Loader=SafeLoader) or {}
         return self._config
 
     def get(self, key: str, default: Any = None) -> Any:
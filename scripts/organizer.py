@@ -213,47 +213,46 @@ def main():
     if args.verbose:
         print(f"Mode: {'Preview' if dry_run else 'Execute'}")
 
-    # Initialize runner
-    runner = Runner(
+    # Initialize runner (closing it flushes the operation log)
+    with Runner(
         rules_dir=config.rules_dir,
         logs_dir=config.logs_dir,
         dry_run=dry_run,
-    )
-
-    # Scan and plan
-    if args.verbose:
-        print("Scanning files...")
-
-    operations = runner.scan_and_plan()
-
-    # Display summary
-    summary = runner.get_summary()
-    print(f"\n=== 操作摘要 ===")
-    print(f"总操作数: {summary['total']}")
-    print(f"  移动: {summary['by_type']['move']}")
-    print(f"  重命名: {summary['by_type']['rename']}")
-    print(f"  标签: {summary['by_type']['tag']}")
-    print(f"  重复检测: {summary['by_type']['duplicate']}")
-
-    # Show operations
-    if operations:
-        print(f"\n=== 预览操作 ===")
-        for i, op in enumerate(operations, 1):
-            print(f"{i}. [{op.operation_type}] {op.source.name}")
-            if op.operation_type == "move":
-                print(f"   -> {op.details.get('destination')}")
-            elif op.operation_type == "rename":
-                print(f"   -> {op.details}")
-
-    # Execute if requested
-    if dry_run:
-        print("\n=== 预览模式 ===")
-        print("使用 --execute 参数执行操作")
-    else:
-        print("\n=== 执行中 ===")
-        results = runner.execute()
-        success = sum(1 for r in results if r.operation.success)
-        print(f"完成: {success}/{len(results)} 成功")
+    ) as runner:
+        # Scan and plan
+        if args.verbose:
+            print("Scanning files...")
+
+        operations = runner.scan_and_plan()
+
+        # Display summary
+        summary = runner.get_summary()
+        print(f"\n=== 操作摘要 ===")
+        print(f"总操作数: {summary['total']}")
+        print(f"  移动: {summary['by_type']['move']}")
+        print(f"  重命名: {summary['by_type']['rename']}")
+        print(f"  标签: {summary['by_type']['tag']}")
+        print(f"  重复检测: {summary['by_type']['duplicate']}")
+
+        # Show operations
+        if operations:
+            print(f"\n=== 预览操作 ===")
+            for i, op in enumerate(operations, 1):
+                print(f"{i}. [{op.operation_type}] {os.path.basename(op.source)}")
+                if op.operation_type == "move":
+                    print(f"   -> {op.details.get('destination')}")
+                elif op.operation_type == "rename":
+                    print(f"   -> {op.details}")
+
+        # Execute if requested
+        if dry_run:
+            print("\n=== 预览模式 ===")
+            print("使用 --execute 参数执行操作")
+        else:
+            print("\n=== 执行中 ===")
+            results = runner.execute()
+            success = sum(1 for r in results if r.operation.success)
+            print(f"完成: {success}/{len(results)} 成功")
 
 
 if __name__ == "__main__":
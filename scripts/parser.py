@@ -1,11 +1,117 @@
 """Rule parsing module for File Organizer."""
+import json
 import os
 import re
 import yaml
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Callable
+from typing import Any, Dict, List, Optional, Callable, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
+from functools import lru_cache
+
+from config import SafeLoader
+
+try:
+    import orjson
+except ImportError:  # Optional: faster rule cache parsing
+    orjson = None
+
+
+def _compile_matcher(
+    path_prefix: Optional[str],
+    ext_set: Optional[frozenset],
+    name_re: Optional["re.Pattern"],
+    pattern_re: Optional["re.Pattern"],
+    size_gt: Optional[int],
+    size_lt: Optional[int],
+) -> Tuple[Callable[[str, str, Callable[[], os.stat_result]], bool], Callable[[os.DirEntry], bool]]:
+    """
+    Generate predicates for a condition.
+
+    Returns ``match(path, name, get_stat)`` and ``match_entry(entry)``, the
+    same checks specialized for os.scandir entries. Only the checks that
+    are actually set are emitted, so matching a file runs straight-line
+    code with no per-field None tests, and match_entry only reads the
+    entry attributes it needs. The generated source never embeds rule
+    values; they are bound through the namespace. get_stat is only called
+    when a size check is present.
+    """
+    body = []
+    namespace: Dict[str, Any] = {}
+
+    # Check path
+    if path_prefix:
+        namespace["path_prefix"] = path_prefix
+        body.append("    if not path.startswith(path_prefix): return False")
+
+    # Check extension (same as Path.suffix: none for ".bashrc" style names)
+    if ext_set is not None:
+        namespace["ext_set"] = ext_set
+        body.append("    base, _, ext = name.rpartition('.')")
+        body.append("    if (ext.lower() if base else '') not in ext_set: return False")
+
+    # Check name pattern (regex)
+    if name_re is not None:
+        namespace["name_search"] = name_re.search
+        body.append("    if name_search(name) is None: return False")
+
+    # Check content pattern (regex in filename)
+    if pattern_re is not None:
+        namespace["pattern_search"] = pattern_re.search
+        body.append("    if pattern_search(name) is None: return False")
+
+    # Check size
+    if size_gt or size_lt:
+        body.append("    try:")
+        body.append("        size = get_stat().st_size")
+        body.append("    except OSError:")
+        body.append("        return False")
+        if size_gt:
+            namespace["size_gt"] = size_gt
+            body.append("    if size <= size_gt: return False")
+        if size_lt:
+            namespace["size_lt"] = size_lt
+            body.append("    if size >= size_lt: return False")
+
+    body.append("    return True")
+
+    entry_prologue = []
+    if path_prefix:
+        entry_prologue.append("    path = entry.path")
+    if ext_set is not None or name_re is not None or pattern_re is not None:
+        entry_prologue.append("    name = entry.name")
+    if size_gt or size_lt:
+        entry_prologue.append("    get_stat = entry.stat")
+
+    lines = ["def match(path, name, get_stat):", *body,
+             "def match_entry(entry):", *entry_prologue, *body]
+    exec("\n".join(lines), namespace)
+    return namespace["match"], namespace["match_entry"]
+
+
+@lru_cache(maxsize=256)
+def _compile_condition(
+    path: Optional[str],
+    ext_set: Optional[frozenset],
+    name_pattern: Optional[str],
+    pattern: Optional[str],
+    size_gt: Optional[int],
+    size_lt: Optional[int],
+) -> Tuple[Callable[[str, str, Callable[[], os.stat_result]], bool], Callable[[os.DirEntry], bool]]:
+    """
+    Compile the predicates for a condition's content.
+
+    Cached by content, so identical conditions (e.g. the same rule files
+    reloaded by each scan_and_plan) reuse the generated matchers.
+    """
+    return _compile_matcher(
+        os.path.expanduser(path) if path else None,
+        ext_set,
+        re.compile(name_pattern) if name_pattern else None,
+        re.compile(pattern) if pattern else None,
+        size_gt,
+        size_lt,
+    )
 
 
 @dataclass
@@ -18,42 +124,81 @@ class Condition:
     size_lt: Optional[int] = None
     name_pattern: Optional[str] = None
 
-    def matches(self, file_path: Path) -> bool:
-        """Check if file matches this condition."""
-        # Check path
-        if self.path:
-            path_pattern = os.path.expanduser(self.path)
-            if not str(file_path).startswith(path_pattern):
-                return False
-
-        # Check extension
-        if self.extension:
-            ext = file_path.suffix.lower().lstrip(".")
-            if ext not in [e.lower().lstrip(".") for e in self.extension]:
-                return False
-
-        # Check name pattern (regex)
-        if self.name_pattern:
-            if not re.search(self.name_pattern, file_path.name):
-                return False
-
-        # Check content pattern (regex in filename)
-        if self.pattern:
-            if not re.search(self.pattern, file_path.name):
-                return False
-
-        # Check size
-        if self.size_gt or self.size_lt:
-            try:
-                size = file_path.stat().st_size
-                if self.size_gt and size <= self.size_gt:
-                    return False
-                if self.size_lt and size >= self.size_lt:
-                    return False
-            except OSError:
-                return False
-
-        return True
+    def __post_init__(self) -> None:
+        # Precompute matching state once instead of on every file
+        ext_set = (
+            frozenset(e.lower().lstrip(".") for e in self.extension)
+            if self.extension else None
+        )
+        self._matcher, self._entry_matcher = _compile_condition(
+            self.path,
+            ext_set,
+            self.name_pattern,
+            self.pattern,
+            self.size_gt,
+            self.size_lt,
+        )
+
+    def matches(
+        self,
+        file_path: Path,
+        stat_cache: Optional[Dict[Path, os.stat_result]] = None,
+    ) -> bool:
+        """
+        Check if file matches this condition.
+
+        Args:
+            file_path: File to check
+            stat_cache: Stat results shared across rules; size checks read
+                from it and add to it, so each file is stat'ed once
+
+        Returns:
+            True if the file matches
+        """
+        def get_stat() -> os.stat_result:
+            file_stat = stat_cache.get(file_path) if stat_cache is not None else None
+            if file_stat is None:
+                file_stat = file_path.stat()
+                if stat_cache is not None:
+                    stat_cache[file_path] = file_stat
+            return file_stat
+
+        return self._matcher(str(file_path), file_path.name, get_stat)
+
+    def matches_entry(self, entry: os.DirEntry) -> bool:
+        """
+        Check if an os.scandir entry matches this condition.
+
+        Reads the entry's name and its cached stat, so no Path is built
+        and size checks cost at most one stat per entry.
+        """
+        return self._entry_matcher(entry)
+
+    def compile(self) -> Callable[[os.DirEntry], bool]:
+        """
+        Get the compiled predicate for os.scandir entries.
+
+        Built once per condition; use with filter() or a comprehension to
+        match a whole file list without per-call method dispatch.
+        """
+        return self._entry_matcher
+
+    def matches_batch(
+        self,
+        files: List[Path],
+        stat_cache: Optional[Dict[Path, os.stat_result]] = None,
+    ) -> List[Path]:
+        """
+        Filter files matching this condition.
+
+        Args:
+            files: Files to check
+            stat_cache: Pre-built stat results, used for size checks
+
+        Returns:
+            Matching files, in input order
+        """
+        return [f for f in files if self.matches(f, stat_cache)]
 
 
 @dataclass
@@ -87,6 +232,27 @@ class DuplicateRule:
     enabled: bool = True
 
 
+# Keys that mark a standalone YAML document as a single rule
+RULE_DOCUMENT_KEYS = ("condition", "action", "check_by")
+
+# Bumped when the parsed form of rule files changes, invalidating caches
+RULE_CACHE_VERSION = 2
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Serialize to JSON bytes, using orjson if available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _json_loads(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson if available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 def parse_size(size_str: str) -> int:
     """Parse size string like '100MB' to bytes."""
     size_str = size_str.strip().upper()
@@ -193,8 +359,7 @@ class RuleParser:
         if not rule_file.exists():
             return []
 
-        with open(rule_file, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f) or {}
+        data = self._read_rule_file(rule_file)
 
         rules = []
         for rule_data in data.get("rules", []):
@@ -205,6 +370,49 @@ class RuleParser:
 
         return [r for r in rules if r.enabled]
 
+    def _read_rule_file(self, rule_file: Path) -> Dict[str, Any]:
+        """
+        Read a YAML rule file, reusing its JSON cache if the file is unchanged.
+
+        The cache is a hidden sidecar next to the rule file, keyed by the
+        file's mtime and size (and the cache format version).
+        """
+        cache_file = rule_file.with_name(f".{rule_file.name}.cache.json")
+        file_stat = rule_file.stat()
+        key = [RULE_CACHE_VERSION, file_stat.st_mtime_ns, file_stat.st_size]
+
+        try:
+            cached = _json_loads(cache_file.read_bytes())
+            if cached["key"] == key:
+                return cached["data"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        # Documents are parsed one at a time; each is either the usual
+        # {"rules": [...]} mapping or a single rule (multi-document files).
+        # Empty or unrecognised mappings are skipped: an empty rule would
+        # match every file
+        rules_data = []
+        with open(rule_file, "r", encoding="utf-8") as f:
+            for doc in yaml.load_all(f, Loader=SafeLoader):
+                if not isinstance(doc, dict):
+                    continue
+                if "rules" in doc:
+                    rules_data.extend(doc["rules"] or [])
+                elif any(k in doc for k in RULE_DOCUMENT_KEYS):
+                    rules_data.append(doc)
+        data = {"rules": rules_data}
+
+        try:
+            encoded = _json_dumps({"key": key, "data": data})
+            # Only cache data that survives the JSON round trip unchanged
+            if _json_loads(encoded)["data"] == data:
+                cache_file.write_bytes(encoded)
+        except (OSError, ValueError, TypeError):
+            pass
+
+        return data
+
     def load_all_rules(self) -> Dict[str, List]:
         """Load all rules."""
         return {
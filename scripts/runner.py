@@ -1,21 +1,78 @@
 """Runner module for executing file organization tasks."""
 import os
 import logging
+import queue
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from parser import Rule, DuplicateRule, RuleParser
 from actions.mover import Mover
 from actions.renamer import Renamer
 from actions.tagger import Tagger
-from actions.deduplicator import Deduplicator
+from actions.deduplicator import Deduplicator, hash_backend
+from utils.file_utils import iter_file_entries
+
+
+# Roots scanned by rules without their own path, expanded once at import
+_DEFAULT_SCAN_ROOTS = (
+    os.path.expanduser("~/Downloads"),
+    os.path.expanduser("~/Documents"),
+    os.path.expanduser("~/Desktop"),
+)
+_DUPLICATE_SCAN_ROOTS = _DEFAULT_SCAN_ROOTS[:2]
+
+
+@lru_cache(maxsize=None)
+def _expanduser(path: str) -> str:
+    """os.path.expanduser, memoized; planners expand the same few paths repeatedly."""
+    return os.path.expanduser(path)
+
+
+def _collect_rule_filters(
+    rules: Dict[str, List],
+) -> Tuple[Optional[Set[str]], Optional[List[str]]]:
+    """
+    Work out which files any rule could match, to prune the directory walk.
+
+    Returns:
+        (allowed extensions, allowed path prefixes); None means unrestricted.
+        Duplicate rules compare every file, so they disable both filters.
+    """
+    if rules.get("duplicate"):
+        return None, None
+
+    allowed_exts: Optional[Set[str]] = set()
+    allowed_prefixes: Optional[List[str]] = []
+
+    for rule_type in ("move", "rename", "tag"):
+        for rule in rules.get(rule_type, []):
+            condition = rule.condition
+
+            if allowed_exts is not None:
+                if condition.extension:
+                    allowed_exts.update(e.lower().lstrip(".") for e in condition.extension)
+                else:
+                    allowed_exts = None
+
+            if allowed_prefixes is not None:
+                if condition.path:
+                    allowed_prefixes.append(_expanduser(condition.path))
+                else:
+                    allowed_prefixes = None
+
+    return allowed_exts, allowed_prefixes
 
 
 class Operation:
     """Represents a single operation to be performed."""
 
-    def __init__(self, rule_name: str, operation_type: str, source: Path, details: Dict[str, Any]):
+    def __init__(self, rule_name: str, operation_type: str, source: str, details: Dict[str, Any]):
         self.rule_name = rule_name
         self.operation_type = operation_type
         self.source = source
@@ -48,6 +105,13 @@ class Runner:
         self.operations: List[Operation] = []
         self.results: List[OperationResult] = []
 
+        # Scanned files per directory (by absolute path), shared by all rules
+        self._scan_cache: Dict[str, List[os.DirEntry]] = {}
+        # Extension / path prefix filters pushed down into the walk
+        self._scan_filters: Tuple[Optional[Set[str]], Optional[List[str]]] = (None, None)
+        # Planned operations per type, counted as they are yielded
+        self._op_counts: Counter = Counter()
+
         # Initialize action handlers
         self.mover = Mover()
         self.renamer = Renamer()
@@ -55,137 +119,204 @@ class Runner:
         self.deduplicator = Deduplicator()
 
         # Setup logging
+        self._log_handler: Optional[QueueHandler] = None
+        self._log_listener: Optional[QueueListener] = None
         self._setup_logging()
 
+    def __enter__(self) -> "Runner":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
     def _setup_logging(self) -> None:
-        """Setup logging to file."""
+        """
+        Setup logging to file and console.
+
+        Records are only queued by the logging calls; a listener thread
+        does the file and console writes, so execute() never waits on I/O
+        for its per-operation log lines. Call close() to flush them.
+        """
         log_file = self.logs_dir / "operation.log"
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s - %(levelname)s - %(message)s",
-            handlers=[
-                logging.FileHandler(log_file, encoding="utf-8"),
-                logging.StreamHandler(),
-            ],
-        )
+        formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+        handlers = [
+            logging.FileHandler(log_file, encoding="utf-8"),
+            logging.StreamHandler(),
+        ]
+        for handler in handlers:
+            handler.setFormatter(formatter)
 
-    def scan_and_plan(self) -> List[Operation]:
-        """Scan directories and plan operations based on rules."""
-        self.operations = []
-        rules = self.parser.load_all_rules()
+        log_queue: queue.Queue = queue.Queue(-1)
+        self._log_handler = QueueHandler(log_queue)
+        self._log_listener = QueueListener(log_queue, *handlers)
 
-        # Process move rules
-        for rule in rules.get("move", []):
-            self._plan_move_operations(rule)
+        root = logging.getLogger()
+        root.setLevel(logging.INFO)
+        root.addHandler(self._log_handler)
+        self._log_listener.start()
 
-        # Process rename rules
-        for rule in rules.get("rename", []):
-            self._plan_rename_operations(rule)
+        logging.info("Content hash backend: %s", hash_backend())
 
-        # Process tag rules
-        for rule in rules.get("tag", []):
-            self._plan_tag_operations(rule)
+    def close(self) -> None:
+        """Flush pending log records and release the log file and hash cache."""
+        if self._log_listener is not None:
+            logging.getLogger().removeHandler(self._log_handler)
+            # stop() writes out everything still queued
+            self._log_listener.stop()
+            for handler in self._log_listener.handlers:
+                handler.close()
+            self._log_listener = None
+            self._log_handler = None
 
-        # Process duplicate rules
-        for rule in rules.get("duplicate", []):
-            self._plan_duplicate_operations(rule)
+        self.deduplicator.close()
 
+    def scan_and_plan(self) -> List[Operation]:
+        """Scan directories and plan operations based on rules."""
+        self.operations = list(self.iter_operations())
         return self.operations
 
-    def _scan_directory(self, path: str) -> List[Path]:
-        """Scan directory for files."""
-        scan_path = Path(os.path.expanduser(path))
-        if not scan_path.exists():
-            return []
+    def iter_operations(self) -> Iterator[Operation]:
+        """
+        Lazily scan directories and yield planned operations.
 
-        files = []
-        if scan_path.is_file():
-            files.append(scan_path)
-        else:
-            for item in scan_path.rglob("*"):
-                if item.is_file():
-                    files.append(item)
+        Operations can be handed to execute() as they are produced, so
+        execution starts before planning finishes and no planned-operation
+        list is built. get_summary() reflects the operations yielded so far.
+        """
+        self._scan_cache = {}
+        self._op_counts = Counter()
+        rules = self.parser.load_all_rules()
+        self._scan_filters = _collect_rule_filters(rules)
+
+        operations = chain.from_iterable(chain(
+            # Process move rules
+            (self._gen_move_operations(rule) for rule in rules.get("move", [])),
+            # Process rename rules
+            (self._gen_rename_operations(rule) for rule in rules.get("rename", [])),
+            # Process tag rules
+            (self._gen_tag_operations(rule) for rule in rules.get("tag", [])),
+            # Process duplicate rules
+            (self._gen_duplicate_operations(rule) for rule in rules.get("duplicate", [])),
+        ))
+
+        counts = self._op_counts
+        for operation in operations:
+            counts[operation.operation_type] += 1
+            yield operation
+
+    def _scan_directory(self, path: str) -> List[os.DirEntry]:
+        """
+        Scan directory for files (hidden directories are skipped).
+
+        Results are cached for the current planning pass, so each directory
+        is walked once no matter how many rules use it.
+        """
+        scan_path = _expanduser(path)
+        # Not realpath: cached entry paths keep the alias that was walked,
+        # and conditions match them by path prefix
+        key = os.path.abspath(scan_path)
+
+        files = self._scan_cache.get(key)
+        if files is None:
+            if os.path.isfile(scan_path):
+                # Single file: pick its entry from the parent directory listing
+                parent, name = os.path.split(os.path.abspath(scan_path))
+                entries = iter_file_entries(parent, recursive=False, include_hidden=True)
+                files = [entry for entry in entries if entry.name == name]
+            else:
+                extensions, prefixes = self._scan_filters
+                # Hidden directories are pruned, hidden files are kept
+                files = list(iter_file_entries(
+                    scan_path, extensions=extensions, prefixes=prefixes,
+                    include_hidden_files=True,
+                ))
+            self._scan_cache[key] = files
 
         return files
 
-    def _plan_move_operations(self, rule: Rule) -> None:
-        """Plan move operations for a rule."""
+    def _scan_directories(self, paths: Sequence[str]) -> List[os.DirEntry]:
+        """
+        Scan several directories, walking the ones not yet cached in parallel.
+
+        Directory listing releases the GIL, so threads overlap the stat and
+        readdir latency of each root (notably on network-mounted homes).
+        """
+        pending = [
+            path for path in paths
+            if os.path.abspath(_expanduser(path)) not in self._scan_cache
+        ]
+        if len(pending) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(pending))) as executor:
+                list(executor.map(self._scan_directory, pending))
+
+        files = []
+        for path in paths:
+            files.extend(self._scan_directory(path))
+        return files
+
+    def _gen_move_operations(self, rule: Rule) -> Iterator[Operation]:
+        """Yield move operations for a rule."""
         if not rule.condition.path:
             return
 
         files = self._scan_directory(rule.condition.path)
+        pred = rule.condition.compile()
+        dest = _expanduser(rule.action.move)
+
+        for entry in filter(pred, files):
+            operation = Operation(
+                rule_name=rule.name,
+                operation_type="move",
+                source=entry.path,
+                details={
+                    "destination": dest,
+                    "create_if_missing": rule.action.create_if_missing,
+                    "tag": rule.action.tag,
+                },
+            )
+            yield operation
+
+    def _gen_rename_operations(self, rule: Rule) -> Iterator[Operation]:
+        """Yield rename operations for a rule."""
+        pred = rule.condition.compile()
 
-        for file_path in files:
-            if rule.condition.matches(file_path):
-                dest = os.path.expanduser(rule.action.move)
+        # Scan common locations if no specific path
+        self._scan_directories(_DEFAULT_SCAN_ROOTS)
+        for scan_path in _DEFAULT_SCAN_ROOTS:
+            files = self._scan_directory(scan_path)
+            for entry in filter(pred, files):
                 operation = Operation(
                     rule_name=rule.name,
-                    operation_type="move",
-                    source=file_path,
+                    operation_type="rename",
+                    source=entry.path,
                     details={
-                        "destination": dest,
-                        "create_if_missing": rule.action.create_if_missing,
-                        "tag": rule.action.tag,
+                        "replace": rule.action.replace,
+                        "prefix": rule.action.prefix,
+                        "suffix": rule.action.suffix,
+                        "separator": rule.action.separator,
                     },
                 )
-                self.operations.append(operation)
-
-    def _plan_rename_operations(self, rule: Rule) -> None:
-        """Plan rename operations for a rule."""
-        # Scan common locations if no specific path
-        scan_paths = [
-            os.path.expanduser("~/Downloads"),
-            os.path.expanduser("~/Documents"),
-            os.path.expanduser("~/Desktop"),
-        ]
+                yield operation
 
-        for scan_path in scan_paths:
-            files = self._scan_directory(scan_path)
-            for file_path in files:
-                if rule.condition.matches(file_path):
-                    operation = Operation(
-                        rule_name=rule.name,
-                        operation_type="rename",
-                        source=file_path,
-                        details={
-                            "replace": rule.action.replace,
-                            "prefix": rule.action.prefix,
-                            "suffix": rule.action.suffix,
-                            "separator": rule.action.separator,
-                        },
-                    )
-                    self.operations.append(operation)
-
-    def _plan_tag_operations(self, rule: Rule) -> None:
-        """Plan tag operations for a rule."""
-        scan_paths = [
-            os.path.expanduser("~/Downloads"),
-            os.path.expanduser("~/Documents"),
-            os.path.expanduser("~/Desktop"),
-        ]
+    def _gen_tag_operations(self, rule: Rule) -> Iterator[Operation]:
+        """Yield tag operations for a rule."""
+        pred = rule.condition.compile()
 
-        for scan_path in scan_paths:
+        self._scan_directories(_DEFAULT_SCAN_ROOTS)
+        for scan_path in _DEFAULT_SCAN_ROOTS:
             files = self._scan_directory(scan_path)
-            for file_path in files:
-                if rule.condition.matches(file_path):
-                    operation = Operation(
-                        rule_name=rule.name,
-                        operation_type="tag",
-                        source=file_path,
-                        details=rule.action.tag or {},
-                    )
-                    self.operations.append(operation)
-
-    def _plan_duplicate_operations(self, rule: DuplicateRule) -> None:
-        """Plan duplicate detection operations."""
-        scan_paths = [
-            os.path.expanduser("~/Downloads"),
-            os.path.expanduser("~/Documents"),
-        ]
+            for entry in filter(pred, files):
+                operation = Operation(
+                    rule_name=rule.name,
+                    operation_type="tag",
+                    source=entry.path,
+                    details=rule.action.tag or {},
+                )
+                yield operation
 
-        all_files = []
-        for scan_path in scan_paths:
-            all_files.extend(self._scan_directory(scan_path))
+    def _gen_duplicate_operations(self, rule: DuplicateRule) -> Iterator[Operation]:
+        """Yield duplicate detection operations."""
+        all_files = self._scan_directories(_DUPLICATE_SCAN_ROOTS)
 
         duplicates = self.deduplicator.find_duplicates(
             all_files,
@@ -196,23 +327,29 @@ class Runner:
             operation = Operation(
                 rule_name=rule.name,
                 operation_type="duplicate",
-                source=duplicate_group[0],
+                source=str(duplicate_group[0]),
                 details={
                     "duplicates": duplicate_group,
                     "action": rule.action,
                 },
             )
-            self.operations.append(operation)
+            yield operation
+
+    def execute(self, operations: Optional[Iterable[Operation]] = None) -> List[OperationResult]:
+        """
+        Execute planned operations.
 
-    def execute(self) -> List[OperationResult]:
-        """Execute planned operations."""
+        Args:
+            operations: Operations to run, e.g. iter_operations() to stream
+                them; defaults to the list from scan_and_plan()
+        """
         if self.dry_run:
             logging.info("Dry run mode - no operations will be executed")
             return []
 
         self.results = []
 
-        for operation in self.operations:
+        for operation in (self.operations if operations is None else operations):
             try:
                 if operation.operation_type == "move":
                     self._execute_move(operation)
@@ -225,13 +362,13 @@ class Runner:
 
                 operation.executed = True
                 operation.success = True
-                logging.info(f"Success: {operation}")
+                logging.info("Success: %s", operation)
 
             except Exception as e:
                 operation.executed = True
                 operation.success = False
                 operation.error = str(e)
-                logging.error(f"Failed: {operation} - {e}")
+                logging.error("Failed: %s - %s", operation, e)
 
             self.results.append(OperationResult(operation))
 
@@ -243,16 +380,16 @@ class Runner:
         if operation.details.get("create_if_missing"):
             dest.mkdir(parents=True, exist_ok=True)
 
-        self.mover.move(operation.source, dest)
+        new_path = self.mover.move(Path(operation.source), dest)
 
         # Apply tag if specified
         if operation.details.get("tag"):
-            self.tagger.add_tag(operation.source, **operation.details["tag"])
+            self.tagger.add_tag(new_path, **operation.details["tag"])
 
     def _execute_rename(self, operation: Operation) -> None:
         """Execute rename operation."""
         self.renamer.rename(
-            operation.source,
+            Path(operation.source),
             replace=operation.details.get("replace"),
             prefix=operation.details.get("prefix"),
             suffix=operation.details.get("suffix"),
@@ -276,14 +413,13 @@ class Runner:
         )
 
     def get_summary(self) -> Dict[str, Any]:
-        """Get summary of operations."""
+        """Get summary of operations (counted while planning, no rescan of the list)."""
+        counts = self._op_counts
         return {
-            "total": len(self.operations),
+            "total": sum(counts.values()),
             "by_type": {
-                "move": sum(1 for o in self.operations if o.operation_type == "move"),
-                "rename": sum(1 for o in self.operations if o.operation_type == "rename"),
-                "tag": sum(1 for o in self.operations if o.operation_type == "tag"),
-                "duplicate": sum(1 for o in self.operations if o.operation_type == "duplicate"),
+                op_type: counts.get(op_type, 0)
+                for op_type in ("move", "rename", "tag", "duplicate")
             },
             "dry_run": self.dry_run,
         }
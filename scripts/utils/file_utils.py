@@ -1,7 +1,19 @@
 """File utilities."""
 import os
 from pathlib import Path
-from typing import List, Union
+from typing import AbstractSet, Iterator, List, Optional, Sequence, Union
+
+
+# Extensions (without the dot) treated as text by is_text_file
+_TEXT_EXTS = frozenset({
+    "txt", "md", "json", "yaml", "yml", "xml", "csv",
+    "py", "js", "ts", "html", "css", "scss", "less",
+    "sh", "bash", "zsh", "fish",
+    "c", "cpp", "h", "hpp", "java", "go", "rs",
+    "sql", "graphql", "proto",
+})
+
+SIZE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
 
 
 def get_file_size(file_path: Union[str, Path]) -> int:
@@ -11,33 +23,99 @@ def get_file_size(file_path: Union[str, Path]) -> int:
 
 def format_size(size_bytes: int) -> str:
     """Format size in human-readable format."""
-    for unit in ["B", "KB", "MB", "GB", "TB"]:
-        if size_bytes < 1024:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024
-    return f"{size_bytes:.1f} PB"
+    # Unit index straight from the bit length: each unit is 10 bits
+    # (1024x) larger, PB is the last one
+    i = min(int(size_bytes).bit_length() - 1, 50) // 10 if size_bytes >= 1024 else 0
+    return f"{size_bytes / (1 << (i * 10)):.1f} {SIZE_UNITS[i]}"
 
 
-def list_files(
+def iter_file_entries(
     directory: Union[str, Path],
     recursive: bool = True,
     include_hidden: bool = False,
-) -> List[Path]:
-    """List all files in a directory."""
-    directory = Path(directory)
-    if not directory.exists():
-        return []
+    extensions: Optional[AbstractSet[str]] = None,
+    prefixes: Optional[Sequence[str]] = None,
+    include_hidden_files: Optional[bool] = None,
+) -> Iterator[os.DirEntry]:
+    """
+    Yield os.scandir entries for files in a directory.
+
+    File type checks come from the directory listing, and each entry caches
+    its stat, so no extra syscalls are made per file. Hidden entries are
+    skipped before recursing, symlinked directories are not followed, and
+    unreadable directories are skipped.
 
-    files = []
-    pattern = "**/*" if recursive else "*"
+    Args:
+        directory: Directory to scan
+        recursive: Descend into subdirectories
+        include_hidden: Include names starting with "."
+        extensions: Only yield files with these lowercase extensions
+            (without the dot)
+        prefixes: Only descend into subdirectories on the way to, or
+            inside, one of these path prefixes
+        include_hidden_files: Include hidden files (defaults to
+            include_hidden); lets callers keep hidden files while still
+            skipping hidden directories
+    """
+    if include_hidden_files is None:
+        include_hidden_files = include_hidden
 
-    for item in directory.glob(pattern):
-        if item.is_file():
-            if not include_hidden and item.name.startswith("."):
-                continue
-            files.append(item)
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                hidden = entry.name.startswith(".")
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if hidden and not include_hidden:
+                            continue
+                        if recursive and (
+                            prefixes is None
+                            or any(p.startswith(entry.path) or entry.path.startswith(p)
+                                   for p in prefixes)
+                        ):
+                            yield from iter_file_entries(
+                                entry.path, recursive, include_hidden, extensions, prefixes,
+                                include_hidden_files,
+                            )
+                    elif hidden and not include_hidden_files:
+                        continue
+                    elif extensions is not None and (
+                        os.path.splitext(entry.name)[1][1:].lower() not in extensions
+                    ):
+                        continue
+                    elif entry.is_file():
+                        yield entry
+                except OSError:
+                    continue
+    except OSError:
+        return
+
+
+def list_files(
+    directory: Union[str, Path],
+    recursive: bool = True,
+    include_hidden: bool = False,
+    as_str: bool = False,
+) -> Union[List[Path], List[str]]:
+    """
+    List all files in a directory, sorted by path.
 
-    return sorted(files)
+    Args:
+        directory: Directory to scan
+        recursive: Descend into subdirectories
+        include_hidden: Include names starting with "."
+        as_str: Return plain path strings instead of Path objects, for
+            callers that only open or compare the paths
+    """
+    paths = [
+        entry.path
+        for entry in iter_file_entries(directory, recursive, include_hidden)
+    ]
+    # Sort plain strings; Path objects are only built for the result
+    paths.sort()
+    if as_str:
+        return paths
+    return [Path(p) for p in paths]
 
 
 def ensure_directory(directory: Union[str, Path]) -> Path:
@@ -49,11 +127,7 @@ def ensure_directory(directory: Union[str, Path]) -> Path:
 
 def is_text_file(file_path: Union[str, Path]) -> bool:
     """Check if a file is likely a text file."""
-    text_extensions = {
-        ".txt", ".md", ".json", ".yaml", ".yml", ".xml", ".csv",
-        ".py", ".js", ".ts", ".html", ".css", ".scss", ".less",
-        ".sh", ".bash", ".zsh", ".fish",
-        ".c", ".cpp", ".h", ".hpp", ".java", ".go", ".rs",
-        ".sql", ".graphql", ".proto",
-    }
-    return Path(file_path).suffix.lower() in text_extensions
+    name = os.fspath(file_path).rpartition(os.sep)[2]
+    # Same as Path.suffix: names like ".bashrc" have no extension
+    base, _, ext = name.rpartition(".")
+    return bool(base) and ext.lower() in _TEXT_EXTS
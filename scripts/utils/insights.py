@@ -2,9 +2,52 @@
 
 注意：这个模块只负责准备数据，实际分析由 AI/LLM 完成。
 """
+import heapq
 import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Tuple
+
+# 大文件阈值 (50MB)
+LARGE_FILE_THRESHOLD = 50 << 20
+# 子目录达到这个数量才用线程池并行统计
+PARALLEL_COUNT_MIN_DIRS = 8
+
+
+# 堆里的文件条目: (size, -序号, name, ext)，序号让同样大小时先扫到的排前面
+_FileItem = Tuple[int, int, str, str]
+
+
+def _push_bounded(heap: List[_FileItem], item: _FileItem, limit: int) -> None:
+    """维护最多 limit 个最大条目的最小堆。"""
+    if len(heap) < limit:
+        heapq.heappush(heap, item)
+    else:
+        heapq.heappushpop(heap, item)
+
+
+def _file_record(item: _FileItem) -> Dict[str, Any]:
+    """把堆里的条目展开成报告用的文件信息。"""
+    size, _, name, ext = item
+    return {
+        "name": name,
+        "size": size,
+        "size_mb": round(size / 1024 / 1024, 1),
+        "ext": ext,
+    }
+
+
+def _count_files(path: str) -> int:
+    """统计目录下（不递归）的文件数，读不了的目录按已数到的算。"""
+    count = 0
+    try:
+        for sub in os.scandir(path):
+            if sub.is_file():
+                count += 1
+    except (OSError, PermissionError):
+        pass
+    return count
 
 
 def scan_directory_basic(path: str, include_subdirs: bool = False) -> Dict[str, Any]:
@@ -30,57 +73,64 @@ def scan_directory_basic(path: str, include_subdirs: bool = False) -> Dict[str,
     if not os.path.exists(path):
         return {"error": f"目录不存在: {path}"}
 
-    files = []
+    # 一次遍历同时累计总数、扩展名和两个 TOP 堆，不保留完整文件列表；
+    # 字典只为最终返回的文件生成
+    total_files = 0
+    total_size = 0
+    top_heap: List[_FileItem] = []
+    large_heap: List[_FileItem] = []
+    subdirs: List[os.DirEntry] = []
     folders = []
-    ext_counts = {}
+    ext_counts: Counter = Counter()
     folder_file_counts = {}
 
     for entry in os.scandir(path):
         if entry.is_file():
             try:
-                stat = entry.stat()
-                ext = os.path.splitext(entry.name)[1].lower().lstrip('.')
-
-                files.append({
-                    "name": entry.name,
-                    "size": stat.st_size,
-                    "size_mb": round(stat.st_size / 1024 / 1024, 1),
-                    "ext": ext,
-                })
-
-                ext_counts[ext] = ext_counts.get(ext, 0) + 1
+                size = entry.stat().st_size
             except (OSError, PermissionError):
                 continue
 
-        elif entry.is_dir():
-            # 统计子目录及其中文件数量
-            subdir_count = 0
-            try:
-                for sub in os.scandir(entry.path):
-                    if sub.is_file():
-                        subdir_count += 1
-            except (OSError, PermissionError):
-                pass
+            ext = os.path.splitext(entry.name)[1].lower().lstrip('.')
+            total_files += 1
+            total_size += size
+            ext_counts[ext] += 1
 
-            folders.append({
-                "name": entry.name,
-                "count": subdir_count,
-            })
-            folder_file_counts[entry.name] = subdir_count
+            item = (size, -total_files, entry.name, ext)
+            _push_bounded(top_heap, item, 20)
+            if size > LARGE_FILE_THRESHOLD:
+                _push_bounded(large_heap, item, 10)
 
-    # 排序
-    files_by_size = sorted(files, key=lambda x: x["size"], reverse=True)
-    top_files = files_by_size[:20]
-    large_files = [f for f in files if f["size"] > 50 * 1024 * 1024][:10]
+        elif entry.is_dir():
+            subdirs.append(entry)
+
+    # 统计子目录及其中文件数量；目录多时并行 scandir，重叠各自的 I/O 延迟
+    subdir_paths = [entry.path for entry in subdirs]
+    if len(subdirs) < PARALLEL_COUNT_MIN_DIRS:
+        subdir_counts = [_count_files(p) for p in subdir_paths]
+    else:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            subdir_counts = list(executor.map(_count_files, subdir_paths))
+
+    for entry, subdir_count in zip(subdirs, subdir_counts):
+        folders.append({
+            "name": entry.name,
+            "count": subdir_count,
+        })
+        folder_file_counts[entry.name] = subdir_count
+
+    # 最大的 20 个 / 最大的 10 个大文件，从大到小
+    top_files = [_file_record(item) for item in sorted(top_heap, reverse=True)]
+    large_files = [_file_record(item) for item in sorted(large_heap, reverse=True)]
 
     # 按文件数排序子目录
     folders_sorted = sorted(folders, key=lambda x: x["count"], reverse=True)
 
     return {
         "path": path,
-        "total_files": len(files),
+        "total_files": total_files,
         "total_folders": len(folders),
-        "total_size_mb": round(sum(f["size"] for f in files) / 1024 / 1024, 1),
+        "total_size_mb": round(total_size / 1024 / 1024, 1),
         "by_extension": dict(sorted(ext_counts.items(), key=lambda x: x[1], reverse=True)[:15]),
         "by_folder": dict(sorted(folder_file_counts.items(), key=lambda x: x[1], reverse=True)[:10]),
         "top_files": top_files,
@@ -89,53 +139,8 @@ def scan_directory_basic(path: str, include_subdirs: bool = False) -> Dict[str,
     }
 
 
-def generate_analysis_prompt(path: str, data: Dict[str, Any]) -> str:
-    """
-    生成 AI 分析提示词。
-
-    Args:
-        path: 要分析的目录路径
-        data: scan_directory_basic 返回的基础数据
-
-    Returns:
-        完整的 prompt 字符串
-    """
-    ext_info = "\n".join([f"  - .{ext}: {count} 个" for ext, count in data["by_extension"].items()])
-
-    top_files = "\n".join([
-        f"  - {f['name']} ({f['size_mb']}MB)"
-        for f in data["top_files"][:10]
-    ])
-
-    large_files = "\n".join([
-        f"  - {f['name']} ({f['size_mb']}MB)"
-        for f in data["large_files"]
-    ]) if data["large_files"] else "  (无)"
-
-    # 文件夹信息
-    folder_info = ""
-    if data.get("folders"):
-        folder_list = "\n".join([f"  - {f['name']}: {f['count']} 个文件" for f in data["folders"][:10]])
-        folder_info = f"\n### 子目录\n{folder_list}"
-
-    prompt = f"""## 📊 目录分析任务
-
-请分析以下目录的文件组成，并给出文件整理规则建议。
-
-### 目录信息
-- 路径: {path}
-- 总文件数: {data['total_files']}
-- 总文件夹数: {data.get('total_folders', 0)}
-- 总大小: {data['total_size_mb']}MB
-
-### 按扩展名统计
-{ext_info}{folder_info}
-
-### 最大文件 (TOP 10)
-{top_files}
-
-### 大文件 (>50MB)
-{large_files}
+# 提示词末尾固定的任务说明
+_PROMPT_TASK = """
 
 ---
 
@@ -160,7 +165,58 @@ rules:
 3. **优先级建议** - 哪些规则最值得先执行
 
 请直接给出规则建议，不需要解释分析过程。"""
-    return prompt
+
+
+def _append_lines(buf: List[str], lines: Iterable[str]) -> None:
+    """按 "\\n".join 的格式把多行追加到 buf，不生成中间字符串。"""
+    for i, line in enumerate(lines):
+        if i:
+            buf.append("\n")
+        buf.append(line)
+
+
+def generate_analysis_prompt(path: str, data: Dict[str, Any]) -> str:
+    """
+    生成 AI 分析提示词。
+
+    Args:
+        path: 要分析的目录路径
+        data: scan_directory_basic 返回的基础数据
+
+    Returns:
+        完整的 prompt 字符串
+    """
+    # 各段依次追加，最后只 join 一次
+    buf: List[str] = []
+    w = buf.append
+
+    w("## 📊 目录分析任务\n\n")
+    w("请分析以下目录的文件组成，并给出文件整理规则建议。\n\n")
+    w("### 目录信息\n")
+    w(f"- 路径: {path}\n")
+    w(f"- 总文件数: {data['total_files']}\n")
+    w(f"- 总文件夹数: {data.get('total_folders', 0)}\n")
+    w(f"- 总大小: {data['total_size_mb']}MB\n\n")
+
+    w("### 按扩展名统计\n")
+    _append_lines(buf, (f"  - .{ext}: {count} 个" for ext, count in data["by_extension"].items()))
+
+    # 文件夹信息
+    if data.get("folders"):
+        w("\n### 子目录\n")
+        _append_lines(buf, (f"  - {f['name']}: {f['count']} 个文件" for f in data["folders"][:10]))
+
+    w("\n\n### 最大文件 (TOP 10)\n")
+    _append_lines(buf, (f"  - {f['name']} ({f['size_mb']}MB)" for f in data["top_files"][:10]))
+
+    w("\n\n### 大文件 (>50MB)\n")
+    if data["large_files"]:
+        _append_lines(buf, (f"  - {f['name']} ({f['size_mb']}MB)" for f in data["large_files"]))
+    else:
+        w("  (无)")
+
+    w(_PROMPT_TASK)
+    return "".join(buf)
 
 
 def format_insights_for_user(data: Dict[str, Any], ai_suggestion: str = None) -> str: